@@ -3,15 +3,22 @@ from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import asyncio
-import json
 import random
-from typing import Dict
+from typing import Any, Dict, Optional
 import logging
+import zlib
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Uploads are consumed in fixed-size chunks so memory stays flat for large videos
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Completion event is constant, so encode it once
+PROGRESS_COMPLETE_EVENT = b"data: " + orjson.dumps({'complete': True}) + b"\n\n"
+
 app = FastAPI()
 
 # Mount static files
@@ -43,49 +50,131 @@ async def home(request: Request):
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     logger.debug("Starting file upload")
-    # Reset progress
-    for platform in upload_progress:
-        upload_progress[platform] = {'progress': 0, 'status': 'uploading', 'error': None}
-    
     # Simulate file processing
-    content = await file.read()
+    while await file.read(UPLOAD_CHUNK_SIZE):
+        pass
     
-    # Start progress monitoring
+    # Reset progress and start monitoring, replacing any previous upload's simulation
+    start_progress_simulation(restart=True)
     return {"message": "Upload started"}
 
+# Shared progress simulation: one producer per upload, fanned out to every /progress client.
+# A new upload cancels the running producer; connected clients follow the replacement.
+progress_task: Optional[asyncio.Task] = None
+progress_updated: Optional[asyncio.Event] = None
+progress_version = 0
+
+def notify_progress(updated: asyncio.Event):
+    global progress_version
+    progress_version += 1
+    # Wake every client currently waiting for the next tick
+    updated.set()
+    updated.clear()
+
+async def simulate_progress(updated: asyncio.Event):
+    try:
+        for progress in range(0, 101, 5):
+            # Simulate random delays
+            await asyncio.sleep(random.uniform(0.1, 0.3))
+
+            # Update progress for each platform
+            for entry in upload_progress.values():
+                entry['progress'] = progress
+                if progress == 100:
+                    # Simulate random failures
+                    if random.random() < 0.2:  # 20% chance of failure
+                        entry['status'] = 'error'
+                        entry['error'] = 'Upload failed. Click to retry.'
+                    else:
+                        entry['status'] = 'success'
+                        entry['error'] = None
+
+            notify_progress(updated)
+    except Exception as e:
+        logger.error(f"Error in progress simulation: {str(e)}")
+    finally:
+        # Let clients observe completion even if the simulation failed or was replaced
+        notify_progress(updated)
+
+def start_progress_simulation(restart: bool = False) -> asyncio.Task:
+    global progress_task, progress_updated
+    if restart:
+        if progress_task is not None and not progress_task.done():
+            logger.debug("Cancelling previous progress simulation")
+            progress_task.cancel()
+        # Wake clients parked on the old Event directly; a task cancelled before
+        # its first step never runs simulate_progress's finally block
+        if progress_updated is not None:
+            notify_progress(progress_updated)
+        # Reset progress
+        for platform in upload_progress:
+            upload_progress[platform] = {'progress': 0, 'status': 'uploading', 'error': None}
+    if restart or progress_task is None or progress_task.done():
+        logger.debug("Starting progress simulation")
+        progress_updated = asyncio.Event()
+        progress_task = asyncio.create_task(simulate_progress(progress_updated))
+    return progress_task
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    qualities: Dict[str, float] = {}
+    for coding in accept_encoding.split(','):
+        name, *params = coding.split(';')
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    # An explicit gzip entry overrides the wildcard; q=0 means "not acceptable"
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+async def gzip_events(events):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    try:
+        async for event in events:
+            # Sync-flush after each event so the client receives it immediately
+            yield compressor.compress(event) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        # Finalize the wrapped stream now if the client disconnects early
+        await events.aclose()
+
 @app.get("/progress")
-async def progress():
+async def progress(request: Request):
     logger.debug("Starting progress monitoring")
     async def generate_progress():
+        start_progress_simulation()
+        # Last state sent to this client, so each event only carries deltas
+        last_sent: Dict[str, Dict[str, Any]] = {}
         try:
-            for progress in range(0, 101, 5):
-                # Update progress for each platform
-                for platform in upload_progress:
-                    # Simulate random delays and errors
-                    await asyncio.sleep(random.uniform(0.1, 0.3))
-                    
-                    if progress == 100:
-                        # Simulate random failures
-                        if random.random() < 0.2:  # 20% chance of failure
-                            upload_progress[platform] = {
-                                'progress': progress,
-                                'status': 'error',
-                                'error': 'Upload failed. Click to retry.'
-                            }
-                        else:
-                            upload_progress[platform] = {
-                                'progress': progress,
-                                'status': 'success',
-                                'error': None
-                            }
-                    else:
-                        upload_progress[platform]['progress'] = progress
-                
-                # Send progress update
-                yield f"data: {json.dumps(upload_progress)}\n\n"
+            while True:
+                # Follow the current producer, which a new upload may have replaced
+                task, updated = progress_task, progress_updated
+                finished = task.done()
+                version = progress_version
+
+                # Send progress update for platforms that changed
+                delta = {
+                    platform: state
+                    for platform, state in upload_progress.items()
+                    if last_sent.get(platform) != state
+                }
+                if delta:
+                    for platform, state in delta.items():
+                        last_sent[platform] = dict(state)
+                    yield b"data: " + orjson.dumps(delta) + b"\n\n"
+
+                if finished:
+                    break
+                # Only wait if no tick or restart happened while the event was being sent
+                if progress_version == version and progress_updated is updated:
+                    await updated.wait()
                 
             # Send completion message
-            yield f"data: {json.dumps({'complete': True})}\n\n"
+            yield PROGRESS_COMPLETE_EVENT
                 
         except asyncio.CancelledError:
             logger.warning("Progress monitoring cancelled")
@@ -94,9 +183,16 @@ async def progress():
             logger.error(f"Error in progress monitoring: {str(e)}")
             raise
 
+    events = generate_progress()
+    headers = {'X-Accel-Buffering': 'no', 'Vary': 'Accept-Encoding'}
+    if accepts_gzip(request.headers.get('accept-encoding', '')):
+        events = gzip_events(events)
+        headers['Content-Encoding'] = 'gzip'
+
     return StreamingResponse(
-        generate_progress(),
-        media_type="text/event-stream"
+        events,
+        media_type="text/event-stream",
+        headers=headers
     )
 
 @app.get("/platform/{platform_id}")
@@ -0,0 +1,50 @@
+import asyncio
+import importlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+from starlette.requests import Request
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    # app.py mounts ./static and ./templates at import time
+    (tmp_path / "static").mkdir()
+    (tmp_path / "templates").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(ROOT))
+    # Keep the simulated ticks fast
+    monkeypatch.setattr(random, "uniform", lambda a, b: 0)
+    sys.modules.pop("app", None)
+    yield importlib.import_module("app")
+    sys.modules.pop("app", None)
+
+
+def test_restart_before_first_step_wakes_waiting_clients(app_module):
+    async def run():
+        async def stream():
+            response = await app_module.progress(Request({"type": "http", "headers": []}))
+            return [event async for event in response.body_iterator]
+
+        replaced = []
+
+        def restart():
+            replaced.append(app_module.progress_task)
+            app_module.start_progress_simulation(restart=True)
+
+        client = asyncio.create_task(stream())
+        # Runs after the client has created the producer and parked on its Event,
+        # but before the producer's first step
+        asyncio.get_running_loop().call_soon(restart)
+
+        done, _ = await asyncio.wait({client}, timeout=5)
+        assert done, "client was never woken after the restart"
+        assert replaced[0].cancelled()
+        return client.result()
+
+    events = asyncio.run(run())
+    assert events[-1] == app_module.PROGRESS_COMPLETE_EVENT